@@ -1,4 +1,4 @@
-import requests, pandas as pd, time  # HTTP requests, tabular data, simple retry timing
+import asyncio, aiohttp, numpy as np, pandas as pd  # concurrent HTTP requests, array math, tabular data
 
 # Fixed geography (Illinois / Cook County)
 STATE = "17"
@@ -8,41 +8,80 @@ COUNTY = "031"
 tracts_2020 = ["750100","750200","750300","750400","750500","750600"]
 tracts_2010 = ["750100","750200","750300","750400","750500","750600","750700"]
 
-def fetch_census(api, vars_, tracts):
-    """Fetch all block groups for a list of tracts; skip any tract that 400s; return one DataFrame."""
-    frames = []
-    for t in tracts:
-        # Build API parameters for one tract at a time
-        params = {
-            "get": ",".join(vars_ + ["NAME"]),
-            "for": "block group:*",
-            "in": f"state:{STATE} county:{COUNTY} tract:{t}"
-        }
-        # Small two-try loop to handle transient errors
-        for attempt in range(2):
-            r = requests.get(api, params=params, timeout=60)
-            if r.status_code == 200:
-                data = r.json()
-                cols = data[0]
-                rows = [dict(zip(cols, rec)) for rec in data[1:]]
-                df = pd.DataFrame(rows)
-                frames.append(df)
-                break
-            else:
-                # brief pause, then retry once
-                time.sleep(0.7)
-        else:
-            # If both attempts fail, warn and continue to next tract
-            print(f"[warn] Skipping tract {t} (HTTP {r.status_code}). URL was: {r.url}")
-    if not frames:
+# Optional on-disk cache: Census responses are idempotent for a fixed
+# year/variable set, so repeat runs can skip the network entirely
+try:
+    from aiohttp_client_cache import CachedSession, SQLiteBackend
+    def make_session(timeout):
+        return CachedSession(cache=SQLiteBackend("census_cache", expire_after=7*24*3600),
+                             timeout=timeout)
+except Exception:
+    def make_session(timeout):
+        return aiohttp.ClientSession(timeout=timeout)
+
+async def fetch_tract(session, api, vars_, t):
+    """Fetch block groups for one tract; return the raw JSON table or None if both tries fail."""
+    # Build API parameters for this tract
+    params = {
+        "get": ",".join(vars_ + ["NAME"]),
+        "for": "block group:*",
+        "in": f"state:{STATE} county:{COUNTY} tract:{t}"
+    }
+    # Small two-try loop to handle transient errors
+    for attempt in range(2):
+        async with session.get(api, params=params) as r:
+            if r.status == 200:
+                return await r.json()
+            status, url = r.status, r.url
+        # brief pause, then retry once
+        await asyncio.sleep(0.7)
+    # If both attempts fail, warn and continue to next tract
+    print(f"[warn] Skipping tract {t} (HTTP {status}). URL was: {url}")
+    return None
+
+async def fetch_census_async(api, vars_, tracts):
+    """Fetch all tracts concurrently; total time is roughly the slowest single request."""
+    timeout = aiohttp.ClientTimeout(total=60)
+    async with make_session(timeout) as session:
+        results = await asyncio.gather(*(fetch_tract(session, api, vars_, t) for t in tracts),
+                                       return_exceptions=True)
+    # Accumulate raw rows and build a single DataFrame at the end (no per-tract
+    # frames, no final concat copy); header row is identical across tracts
+    cols = None
+    all_rows = []
+    for t, data in zip(tracts, results):
+        if isinstance(data, list) and data:
+            cols = cols or data[0]
+            all_rows.extend(data[1:])
+        elif isinstance(data, Exception):
+            # Timeouts/connection errors surface here; warn like the HTTP path
+            print(f"[warn] Skipping tract {t}: {data}")
+    if not all_rows:
         return pd.DataFrame()
     # Combine block groups and standardize IDs
-    df = pd.concat(frames, ignore_index=True)
+    df = pd.DataFrame(all_rows, columns=cols)
     df["TRACT"] = df["tract"].str.zfill(6)
     df["BG"] = df["block group"]
-    df["GEOID_BG"] = "17031" + df["TRACT"] + df["BG"]
+    # Single concat (one temporary) instead of chained "+" allocations
+    df["GEOID_BG"] = df["TRACT"].str.cat(df["BG"]).radd("17031")
+    try:
+        df["GEOID_BG"] = df["GEOID_BG"].astype("string[pyarrow]")  # cheaper merge key than object strings
+    except Exception:
+        pass
     return df
 
+def fetch_census(api, vars_, tracts):
+    """Synchronous wrapper so main() stays a plain function."""
+    return asyncio.run(fetch_census_async(api, vars_, tracts))
+
+def write_csv(df, path):
+    """Write CSV through pyarrow's multithreaded writer; fall back to pandas."""
+    try:
+        import pyarrow as pa, pyarrow.csv as pacsv
+        pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), path)
+    except Exception:
+        df.to_csv(path, index=False)
+
 def main():
     # ---------------- 2020 PL (block-group) ----------------
     # Variables: total population + race + Hispanic table denominator/estimate
@@ -57,14 +96,19 @@ def main():
         "P2_002N":"hisp20"
     })
     if not df20.empty:
-        # Convert to numeric and compute 2020 percentages
-        for c in ["pop20","white20","black20","asian20","p2tot20","hisp20"]:
-            df20[c] = pd.to_numeric(df20[c], errors="coerce")
-        df20["white20_pct"] = (df20["white20"]/df20["pop20"]*100).round(2)
-        df20["black20_pct"] = (df20["black20"]/df20["pop20"]*100).round(2)
-        df20["asian20_pct"] = (df20["asian20"]/df20["pop20"]*100).round(2)
-        df20["hisp20_pct"]  = (df20["hisp20"]/df20["p2tot20"]*100).round(2)
-        df20.to_csv("morgan_park_ca75_2020_blockgroups.csv", index=False)
+        # Convert to numeric (one pass over the 2-D block) and compute 2020 percentages
+        cols20 = ["pop20","white20","black20","asian20","p2tot20","hisp20"]
+        df20[cols20] = df20[cols20].apply(pd.to_numeric, errors="coerce")
+        # Race shares in one (N,3) divide against pop; Hispanic has its own denominator
+        nums = df20[["white20","black20","asian20"]].to_numpy(dtype=np.float64)
+        pop = df20["pop20"].to_numpy(dtype=np.float64)[:, None]
+        df20[["white20_pct","black20_pct","asian20_pct"]] = np.round(
+            np.divide(nums, pop, out=np.full_like(nums, np.nan), where=pop != 0) * 100, 2)
+        hisp = df20["hisp20"].to_numpy(dtype=np.float64)
+        p2 = df20["p2tot20"].to_numpy(dtype=np.float64)
+        df20["hisp20_pct"] = np.round(
+            np.divide(hisp, p2, out=np.full_like(hisp, np.nan), where=p2 != 0) * 100, 2)
+        write_csv(df20, "morgan_park_ca75_2020_blockgroups.csv")
 
     # ---------------- 2010 SF1 (block-group) ----------------
     # Variables: total population + race + Hispanic table denominator/estimate
@@ -79,14 +123,19 @@ def main():
         "P004003":"hisp10"
     })
     if not df10.empty:
-        # Convert to numeric and compute 2010 percentages
-        for c in ["pop10","white10","black10","asian10","p4tot10","hisp10"]:
-            df10[c] = pd.to_numeric(df10[c], errors="coerce")
-        df10["white10_pct"] = (df10["white10"]/df10["pop10"]*100).round(2)
-        df10["black10_pct"] = (df10["black10"]/df10["pop10"]*100).round(2)
-        df10["asian10_pct"] = (df10["asian10"]/df10["pop10"]*100).round(2)
-        df10["hisp10_pct"]  = (df10["hisp10"]/df10["p4tot10"]*100).round(2)
-        df10.to_csv("morgan_park_ca75_2010_blockgroups.csv", index=False)
+        # Convert to numeric (one pass over the 2-D block) and compute 2010 percentages
+        cols10 = ["pop10","white10","black10","asian10","p4tot10","hisp10"]
+        df10[cols10] = df10[cols10].apply(pd.to_numeric, errors="coerce")
+        # Same 2-D divide as the 2020 block
+        nums = df10[["white10","black10","asian10"]].to_numpy(dtype=np.float64)
+        pop = df10["pop10"].to_numpy(dtype=np.float64)[:, None]
+        df10[["white10_pct","black10_pct","asian10_pct"]] = np.round(
+            np.divide(nums, pop, out=np.full_like(nums, np.nan), where=pop != 0) * 100, 2)
+        hisp = df10["hisp10"].to_numpy(dtype=np.float64)
+        p4 = df10["p4tot10"].to_numpy(dtype=np.float64)
+        df10["hisp10_pct"] = np.round(
+            np.divide(hisp, p4, out=np.full_like(hisp, np.nan), where=p4 != 0) * 100, 2)
+        write_csv(df10, "morgan_park_ca75_2010_blockgroups.csv")
 
     # ---------------- Merge & compute change ----------------
     # Only proceed if both years are available
@@ -95,20 +144,20 @@ def main():
         keep10 = ["GEOID_BG","TRACT","BG","pop10","white10","black10","asian10","hisp10","white10_pct","black10_pct","asian10_pct","hisp10_pct"]
         merged = pd.merge(df10[keep10], df20[keep20], on=["TRACT","BG"], how="outer")
 
-        # Helper for percent change with divide-by-zero/NA protection
-        def pct_change(new, old):
-            try:
-                new = float(new); old = float(old)
-                if old == 0: return None
-                return round((new - old) / old * 100.0, 2)
-            except: return None
-
-        # Absolute change and percent change for selected numerators
-        for numer in ["pop","white","black","asian","hisp"]:
-            merged[f"{numer}_chg"] = merged[f"{numer}20"] - merged[f"{numer}10"]
-            merged[f"{numer}_chg_pct"] = [pct_change(n, o) for n, o in zip(merged[f"{numer}20"], merged[f"{numer}10"])]
+        # Absolute change and percent change for all five numerators in one
+        # (N,5) subtract + masked divide over contiguous float64 blocks
+        # (NaN where the 2010 denominator is zero or missing)
+        nums = ["pop","white","black","asian","hisp"]
+        new = merged[[n + "20" for n in nums]].to_numpy(dtype=np.float64)
+        old = merged[[n + "10" for n in nums]].to_numpy(dtype=np.float64)
+        chg = new - old
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pct = np.where((old != 0) & np.isfinite(old) & np.isfinite(new),
+                           np.round((new - old) / old * 100.0, 2), np.nan)
+        merged[[n + "_chg" for n in nums]] = chg
+        merged[[n + "_chg_pct" for n in nums]] = pct
 
-        merged.to_csv("morgan_park_ca75_2010_2020_comparison.csv", index=False)
+        write_csv(merged, "morgan_park_ca75_2010_2020_comparison.csv")
         print("Wrote morgan_park_ca75_2010_2020_comparison.csv")
 
 if __name__ == "__main__":
@@ -2,6 +2,8 @@ import os
 import numpy as np
 import pandas as pd
 import geopandas as gpd
+import matplotlib
+matplotlib.use("Agg")  # headless raster backend; no GUI event loop
 import matplotlib.pyplot as plt
 
 # Config: Input paths and outputs
@@ -10,6 +12,7 @@ BG_SHP  = r"C:\Users\Charles\Downloads\tl_2023_17_bg\tl_2023_17_bg.shp"
 COMMUNITY_SHP = r""
 
 OUT_GPKG = "ca75_acs_bg_maps.gpkg"
+OUT_PARQUET = "ca75_acs_bg_maps.parquet"
 OUT_DIR  = "maps_ca75"
 os.makedirs(OUT_DIR, exist_ok=True)
 
@@ -23,34 +26,57 @@ def make_geoid_bg_from_parts(df):
     for fld in ["STATEFP","COUNTYFP","TRACTCE","BLKGRPCE"]:
         if fld not in df.columns:
             raise SystemExit(f"Block-group layer missing required field: {fld}")
-    return (
-        df["STATEFP"].astype(str).str.zfill(2)
-        + df["COUNTYFP"].astype(str).str.zfill(3)
-        + df["TRACTCE"].astype(str).str.zfill(6)
-        + df["BLKGRPCE"].astype(str).str.zfill(1)
-    )
+    # Concatenate as numpy string arrays — avoids the intermediate object
+    # Series a chain of Series "+" operations would allocate
+    a = df["STATEFP"].astype(str).str.zfill(2).to_numpy(dtype=str)
+    b = df["COUNTYFP"].astype(str).str.zfill(3).to_numpy(dtype=str)
+    c = df["TRACTCE"].astype(str).str.zfill(6).to_numpy(dtype=str)
+    d = df["BLKGRPCE"].astype(str).str.zfill(1).to_numpy(dtype=str)
+    return pd.Series(np.char.add(np.char.add(np.char.add(a, b), c), d), index=df.index)
+
+def normalize_geoid(s):
+    """12-digit string GEOID; plain-string suffix strip for the float '.0' artifact (no regex engine)."""
+    return s.astype(str).str.removesuffix(".0").str.zfill(12)
 
 def ensure_geoid_bg_strings(bg_gdf, acs_df):
     """Ensure both geometry and ACS frames carry a string 12-digit GEOID_BG key for merging."""
     # BG side: use existing GEOID or build from parts
     if "GEOID" in bg_gdf.columns:
-        bg_gdf["GEOID_BG"] = bg_gdf["GEOID"].astype(str).str.replace(r"\.0$", "", regex=True).str.zfill(12)
+        bg_gdf["GEOID_BG"] = normalize_geoid(bg_gdf["GEOID"])
     else:
         bg_gdf["GEOID_BG"] = make_geoid_bg_from_parts(bg_gdf)
     # ACS side: accept GEOID_BG, GEOID, or build from TRACT+BG
     if "GEOID_BG" in acs_df.columns:
-        acs_df["GEOID_BG"] = acs_df["GEOID_BG"].astype(str).str.replace(r"\.0$", "", regex=True).str.zfill(12)
+        acs_df["GEOID_BG"] = normalize_geoid(acs_df["GEOID_BG"])
     elif "GEOID" in acs_df.columns:
-        acs_df["GEOID_BG"] = acs_df["GEOID"].astype(str).str.replace(r"\.0$", "", regex=True).str.zfill(12)
+        acs_df["GEOID_BG"] = normalize_geoid(acs_df["GEOID"])
     elif {"TRACT","BG"}.issubset(acs_df.columns):
         acs_df["GEOID_BG"] = STATEFP + COUNTYFP + acs_df["TRACT"].astype(str).str.zfill(6) + acs_df["BG"].astype(str).str.zfill(1)
     else:
         raise SystemExit("ACS CSV needs GEOID_BG or (GEOID) or (TRACT + BG).")
-    # Force string dtype for merge compatibility
-    bg_gdf["GEOID_BG"] = bg_gdf["GEOID_BG"].astype(str)
-    acs_df["GEOID_BG"] = acs_df["GEOID_BG"].astype(str)
+    # Force string dtype for merge compatibility; prefer the Arrow-backed
+    # string dtype so the join hashes contiguous buffers, not PyObject strings
+    try:
+        bg_gdf["GEOID_BG"] = bg_gdf["GEOID_BG"].astype("string[pyarrow]")
+        acs_df["GEOID_BG"] = acs_df["GEOID_BG"].astype("string[pyarrow]")
+    except Exception:
+        bg_gdf["GEOID_BG"] = bg_gdf["GEOID_BG"].astype(str)
+        acs_df["GEOID_BG"] = acs_df["GEOID_BG"].astype(str)
     return bg_gdf, acs_df
 
+def quantile_bins(x, k):
+    """Equal-count bin codes + breakpoints for a float64 array (quantile classification)."""
+    s = np.sort(x)
+    breaks = np.array([s[int(i * len(s) / k)] for i in range(1, k)])
+    return np.searchsorted(breaks, x), breaks
+
+try:
+    # JIT-compile the classifier when numba is installed (cached across runs)
+    from numba import njit
+    quantile_bins = njit(cache=True)(quantile_bins)
+except Exception:
+    pass
+
 def have_mapclassify():
     """Return True if mapclassify is installed (enables built-in quantile classification)."""
     try:
@@ -59,6 +85,11 @@ def have_mapclassify():
     except Exception:
         return False
 
+# One figure reused for every map — teardown and layout passes otherwise
+# dominate when writing several PNGs back to back
+FIG, AX = plt.subplots(figsize=(7,7))
+FIG.subplots_adjust(left=0, right=1, top=0.95, bottom=0)
+
 def plot_choropleth(gdf, field, title, fname, use_quantiles=True):
     """Generic choropleth helper with NA filtering and quantile fallback."""
     if field not in gdf.columns:
@@ -72,49 +103,58 @@ def plot_choropleth(gdf, field, title, fname, use_quantiles=True):
     gsub = gdf.loc[mask].copy()
     out_path = os.path.join(OUT_DIR, fname)
     try:
+        AX.clear()
         if use_quantiles and have_mapclassify():
             # mapclassify will reduce k if there are too few unique values
-            ax = gsub.plot(column=field, scheme="Quantiles", k=5, legend=True,
-                           figsize=(7,7), edgecolor="black", linewidth=0.25)
+            ax = gsub.plot(ax=AX, column=field, scheme="Quantiles", k=5, legend=True,
+                           edgecolor="black", linewidth=0.25)
         else:
-            # Safe fallback using qcut (handles duplicate bins)
+            # Safe fallback: bin codes from the (optionally JIT-ed) classifier
             k = min(5, max(1, gsub[field].nunique()))
-            cats = pd.qcut(gsub[field], q=k, duplicates="drop")
-            gsub["_qcat"] = cats.astype(str)
-            ax = gsub.plot(column="_qcat", legend=True,
-                           figsize=(7,7), edgecolor="black", linewidth=0.25)
+            vals = pd.to_numeric(gsub[field], errors="coerce").to_numpy(dtype=np.float64)
+            gsub["_qcat"], _ = quantile_bins(vals, k)
+            ax = gsub.plot(ax=AX, column="_qcat", categorical=True, legend=True,
+                           edgecolor="black", linewidth=0.25)
         ax.set_axis_off()
         ax.set_title(title)
-        plt.tight_layout()
-        plt.savefig(out_path, dpi=200)
-        plt.close()
+        FIG.savefig(out_path, dpi=200)
         print(f"Wrote map: {out_path}")
     except Exception as e:
         print(f"[warn] Failed to render {field}: {e}")
 
-def safe_rate(num, den):
-    """Compute 100 * num/den with guardrails for zero/NA denominators."""
-    out = (num / den) * 100
-    return out.mask((den==0) | den.isna() | num.isna()).round(2)
-
 # 1) Read ACS CSV
 if not os.path.exists(ACS_CSV):
     raise SystemExit(f"ACS CSV not found: {ACS_CSV}")
 
-# Keep identifiers as strings if present
-read_kwargs = {"dtype": {"GEOID_BG":"string","GEOID":"string","TRACT":"string","BG":"string"}}
+# Keep identifiers as strings if present. Prefer pyarrow's multithreaded CSV
+# reader with the ID columns pinned to string (no dtype inference on them);
+# fall back to pandas when pyarrow is unavailable.
 try:
-    acs = pd.read_csv(ACS_CSV, **read_kwargs)
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+    id_types = {"GEOID_BG": pa.string(), "GEOID": pa.string(), "TRACT": pa.string(), "BG": pa.string()}
+    acs = pacsv.read_csv(ACS_CSV, convert_options=pacsv.ConvertOptions(column_types=id_types)).to_pandas()
 except Exception:
-    acs = pd.read_csv(ACS_CSV)
+    read_kwargs = {"dtype": {"GEOID_BG":"string","GEOID":"string","TRACT":"string","BG":"string"}}
+    try:
+        acs = pd.read_csv(ACS_CSV, **read_kwargs)
+    except Exception:
+        acs = pd.read_csv(ACS_CSV)
 
 # 2) Read Block Group geometry
 if not os.path.exists(BG_SHP) and not BG_SHP.startswith("zip://"):
     raise SystemExit(f"Block group shapefile not found: {BG_SHP}")
 
-bg = gpd.read_file(BG_SHP)
+# Push the county filter and column selection into the driver (pyogrio)
+# so only Cook County features are parsed from the statewide TIGER file
+try:
+    bg = gpd.read_file(BG_SHP, engine="pyogrio",
+                       columns=["STATEFP","COUNTYFP","TRACTCE","BLKGRPCE","GEOID"],
+                       where=f"COUNTYFP = '{COUNTYFP}'")
+except Exception:
+    bg = gpd.read_file(BG_SHP)
 
-# If statewide, filter to Cook County only
+# If statewide (fallback read), filter to Cook County only
 if "COUNTYFP" in bg.columns:
     bg = bg.loc[bg["COUNTYFP"] == COUNTYFP].copy()
 elif "GEOID" in bg.columns:
@@ -140,12 +180,16 @@ if COMMUNITY_SHP:
             raise SystemExit("Could not find a recognizable CA number/name field to clip.")
         if comm75.empty:
             raise SystemExit("Did not find CA 75 (Morgan Park) in the Community Areas file.")
-        # Align CRS and perform overlay clip
+        # Align CRS, prune candidates via the spatial index, then clip.
+        # The R-tree query keeps only BGs that can touch CA 75, so GEOS
+        # intersection runs on survivors instead of every pair (overlay).
         comm75 = comm75.to_crs(bg.crs)
         try:
-            bg = gpd.overlay(bg, comm75[["geometry"]], how="intersection")
+            comm_union = comm75.geometry.unary_union
+            candidates = bg.iloc[bg.sindex.query(comm_union, predicate="intersects")]
+            bg = gpd.clip(candidates, comm_union)
         except Exception as e:
-            print("[warn] Overlay failed (continuing without clip):", e)
+            print("[warn] Clip failed (continuing without clip):", e)
 
 # 5) Join ACS to geometry
 g = bg.merge(acs, on="GEOID_BG", how="inner")
@@ -162,23 +206,35 @@ def needs_compute(df, field, deps):
     """Return True if field is missing or has zero non-NA values and dependencies exist."""
     return (field not in df.columns) or (pd.to_numeric(df.get(field), errors="coerce").notna().sum() == 0 and all(d in df.columns for d in deps))
 
+def col(df, name):
+    """Column as float64 ndarray (all-NaN when absent)."""
+    return pd.to_numeric(df.get(name, pd.Series(np.nan, index=df.index)), errors="coerce").to_numpy(dtype=np.float64)
+
+# Collect every rate still to compute, then run one fused masked divide over
+# stacked (N,K) numerator/denominator arrays instead of six separate sweeps
+rate_specs = []  # (out_col, numerator, denominator)
 if needs_compute(g, "white_pct", ["white","pop"]):
-    g["white_pct"] = safe_rate(g["white"], g["pop"])
+    rate_specs.append(("white_pct", col(g, "white"), col(g, "pop")))
 if needs_compute(g, "black_pct", ["black","pop"]):
-    g["black_pct"] = safe_rate(g["black"], g["pop"])
+    rate_specs.append(("black_pct", col(g, "black"), col(g, "pop")))
 if needs_compute(g, "asian_pct", ["asian","pop"]):
-    g["asian_pct"] = safe_rate(g["asian"], g["pop"])
+    rate_specs.append(("asian_pct", col(g, "asian"), col(g, "pop")))
 if needs_compute(g, "owner_pct", ["owner","renter"]):
-    denom = g["owner"] + g["renter"]
-    g["owner_pct"] = safe_rate(g["owner"], denom)
-
+    owner = col(g, "owner")
+    rate_specs.append(("owner_pct", owner, owner + col(g, "renter")))
 if needs_compute(g, "hisp_pct", ["hisp","hisp_tot"]):
-    g["hisp_pct"] = safe_rate(g.get("hisp", pd.Series(dtype="float64")), g.get("hisp_tot", pd.Series(dtype="float64")))
+    rate_specs.append(("hisp_pct", col(g, "hisp"), col(g, "hisp_tot")))
 if needs_compute(g, "vac_rate", ["vac_units","units"]):
-    g["vac_rate"] = safe_rate(g.get("vac_units", pd.Series(dtype="float64")), g.get("units", pd.Series(dtype="float64")))
+    rate_specs.append(("vac_rate", col(g, "vac_units"), col(g, "units")))
 if needs_compute(g, "u_20plus_pct", ["u_20_49","u_50p","units_denom"]):
-    numer = g.get("u_20_49", pd.Series(dtype="float64")) + g.get("u_50p", pd.Series(dtype="float64"))
-    g["u_20plus_pct"] = safe_rate(numer, g.get("units_denom", pd.Series(dtype="float64")))
+    rate_specs.append(("u_20plus_pct", col(g, "u_20_49") + col(g, "u_50p"), col(g, "units_denom")))
+
+if rate_specs:
+    numers = np.column_stack([n for _, n, _ in rate_specs])
+    denoms = np.column_stack([d for _, _, d in rate_specs])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rates = np.where(denoms > 0, np.round(numers / denoms * 100.0, 2), np.nan)
+    g[[out for out, _, _ in rate_specs]] = rates
 
 # Quick diagnostics for mapped fields
 print("=== Field availability (non-null counts after join/compute) ===")
@@ -205,6 +261,14 @@ except Exception as e:
     g.to_file(OUT_GEOJSON, driver="GeoJSON")
     print(f"Fell back to {OUT_GEOJSON}")
 
+# Columnar copy for downstream scripts — GeoParquet loads through Arrow and
+# skips GPKG schema parsing entirely (analysismaps.py prefers this file)
+try:
+    g.to_parquet(OUT_PARQUET, compression="zstd")
+    print(f"Wrote {OUT_PARQUET}")
+except Exception as e:
+    print("[warn] Failed to write GeoParquet:", e)
+
 # 8) Make maps (six variables)
 plots = [
     ("black_pct", "Black population (%)", "map_black_pct.png"),
@@ -215,7 +279,23 @@ plots = [
     ("pop", "Total population (count)", "map_pop_count.png"),
 ]
 
-for field, title, fname in plots:
+def render_one(spec):
+    """Worker entry: render one map (each process draws into its own Agg figure)."""
+    field, title, fname = spec
     plot_choropleth(g, field, title, fname, use_quantiles=True)
 
+# Each PNG is an independent CPU-bound draw, so fan out across processes.
+# Only fork is usable here (a spawn child would re-execute this flat
+# script); platforms without fork fall back to the serial loop.
+try:
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing as mp
+    with ProcessPoolExecutor(max_workers=min(len(plots), os.cpu_count() or 1),
+                             mp_context=mp.get_context("fork")) as ex:
+        list(ex.map(render_one, plots))
+except Exception as e:
+    print(f"[warn] Parallel render unavailable ({e}); rendering serially.")
+    for spec in plots:
+        render_one(spec)
+
 print("Done. Check the maps in:", os.path.abspath(OUT_DIR))
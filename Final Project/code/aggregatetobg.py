@@ -18,15 +18,30 @@ def normalize_headers(df):
     df.columns = [c.strip() for c in df.columns]
     return df
 
-# Read ACS and metrics
-acs = pd.read_csv(ACS_CSV, dtype=str, low_memory=False)
+# Read ACS and metrics. The all-string ACS read goes through pyarrow's
+# multithreaded parser when available (every column pinned to string, so no
+# object-dtype inference pass); plain pandas otherwise.
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+    header = pd.read_csv(ACS_CSV, nrows=0).columns
+    acs = pacsv.read_csv(ACS_CSV, convert_options=pacsv.ConvertOptions(
+        column_types={c: pa.string() for c in header})).to_pandas()
+except Exception:
+    acs = pd.read_csv(ACS_CSV, dtype=str, low_memory=False)
 acs = normalize_headers(acs)
 metrics = pd.read_csv(METRICS)
 metrics.columns = [c.strip() for c in metrics.columns]
 
-# Normalize join key
+# Normalize join key; Arrow-backed string dtype (when available) lets the
+# merge hash contiguous buffers instead of per-cell PyObject strings
 acs["GEOID_BG"] = acs["GEOID_BG"].astype(str).str[-12:].str.zfill(12)
 metrics["GEOID_BG"] = metrics["GEOID_BG"].astype(str).str[-12:].str.zfill(12)
+try:
+    acs["GEOID_BG"] = acs["GEOID_BG"].astype("string[pyarrow]")
+    metrics["GEOID_BG"] = metrics["GEOID_BG"].astype("string[pyarrow]")
+except Exception:
+    pass
 
 # Coerce numeric where useful (safe)
 num_like = [
@@ -37,9 +52,8 @@ num_like = [
     "u_20_49","u_50p",
     "owner_pct","vac_rate","black_pct","hisp_pct","u_20plus_pct"
 ]
-for c in num_like:
-    if c in acs.columns:
-        acs[c] = pd.to_numeric(acs[c], errors="coerce")
+present = [c for c in num_like if c in acs.columns]
+acs[present] = acs[present].apply(pd.to_numeric, errors="coerce")  # one pass, not per column
 
 # (Re)compute key rates if missing/empty
 def pct(n, d):
@@ -74,17 +88,19 @@ if ("u_20plus_pct" not in acs.columns) or (pd.to_numeric(acs.get("u_20plus_pct")
 # Merge: keep ALL ACS columns, then add metrics
 joined = acs.merge(metrics, on="GEOID_BG", how="left")
 
-# Final numeric coercion for analysis convenience
-for c in joined.columns:
-    if c not in ["GEOID_BG","TRACT","BG"] and joined[c].dtype == object:
-        # try to coerce numerics but don't force
-        try:
-            joined[c] = pd.to_numeric(joined[c], errors="ignore")
-        except Exception:
-            pass
+# Final numeric coercion for analysis convenience (one batched pass over
+# the object-dtype block; errors="ignore" leaves non-numeric columns alone)
+obj_cols = joined.select_dtypes(include="object").columns.difference(["GEOID_BG","TRACT","BG"])
+if len(obj_cols):
+    joined[obj_cols] = joined[obj_cols].apply(pd.to_numeric, errors="ignore")
 
 # Write and small report
-joined.to_csv(OUT_CSV, index=False)
+# (pyarrow's multithreaded CSV writer when available, else pandas)
+try:
+    import pyarrow as pa, pyarrow.csv as pacsv
+    pacsv.write_csv(pa.Table.from_pandas(joined, preserve_index=False), OUT_CSV)
+except Exception:
+    joined.to_csv(OUT_CSV, index=False)
 print(f"[OK] Wrote merged table: {OUT_CSV}")
 
 have = {k: (k in joined.columns and pd.to_numeric(joined[k], errors='coerce').notna().sum()) for k in ["owner_pct","vac_rate","black_pct"]}
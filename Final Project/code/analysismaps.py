@@ -9,12 +9,15 @@ import os
 import numpy as np
 import pandas as pd
 import geopandas as gpd
+import matplotlib
+matplotlib.use("Agg")  # headless raster backend; no GUI event loop
 import matplotlib.pyplot as plt
 
 # Inputs/outputs
-GPKG   = r"data/spatial/ca75_acs_bg_maps.gpkg"
-LAYER  = "ca75_bg_acs"
-JOINED = r"outputs/tables/bg_joined.csv"
+GPKG    = r"data/spatial/ca75_acs_bg_maps.gpkg"
+PARQUET = r"data/spatial/ca75_acs_bg_maps.parquet"  # columnar copy written by deliverable3
+LAYER   = "ca75_bg_acs"
+JOINED  = r"outputs/tables/bg_joined.csv"
 
 OUTDIR_BASE = r"outputs/figures"
 DIR_NETWORK = os.path.join(OUTDIR_BASE, "networkmetrics")
@@ -23,11 +26,19 @@ DIR_SCATTER = os.path.join(OUTDIR_BASE, "bivariatescatter")
 for d in (OUTDIR_BASE, DIR_NETWORK, DIR_OUTCOME, DIR_SCATTER):
     os.makedirs(d, exist_ok=True)
 
-# Read geometry (fallback: read without layer)
+# Read geometry (prefer the GeoParquet copy; fallback: GPKG, then no layer).
+# The copy is only trusted while it is at least as new as the GPKG, so a
+# refreshed deliverable3 output is never shadowed by a stale cache.
 try:
-    g = gpd.read_file(GPKG, layer=LAYER)
+    if os.path.exists(GPKG) and os.path.getmtime(PARQUET) < os.path.getmtime(GPKG):
+        raise OSError(f"{PARQUET} is older than {GPKG}")
+    g = gpd.read_parquet(PARQUET)
 except Exception:
-    g = gpd.read_file(GPKG)
+    from geoutils import read_gpkg
+    try:
+        g = read_gpkg(GPKG, layer=LAYER)
+    except Exception:
+        g = read_gpkg(GPKG)
 
 # Read joined attributes
 df = pd.read_csv(JOINED)
@@ -48,20 +59,16 @@ if drop_these:
 # Merge
 g = g.merge(df, on="GEOID_BG", how="inner")
 
-# Collapse any _x/_y pairs if they slipped in
-def collapse_suffixes(geodf, base):
-    x, y = f"{base}_x", f"{base}_y"
-    if x in geodf.columns and y in geodf.columns:
-        geodf[base] = geodf[y].where(geodf[y].notna(), geodf[x])
-    elif y in geodf.columns and base not in geodf.columns:
-        geodf[base] = geodf[y]
-    for c in (x, y):
-        if c in geodf.columns:
-            geodf.drop(columns=c, inplace=True)
-
-for base in ["owner_pct","vac_rate","black_pct",
-             "node_density","edge_km_density","betweenness_mean","aspl_mean"]:
-    collapse_suffixes(g, base)
+# Collapse any _x/_y pairs if they slipped in: detect every pair once from
+# the column names, prefer _y values, then drop all suffixed columns in one call
+pairs = [c[:-2] for c in g.columns if c.endswith("_y") and c[:-2] + "_x" in g.columns]
+for base in pairs:
+    g[base] = g[base + "_y"].where(g[base + "_y"].notna(), g[base + "_x"])
+# a lone _y (no _x partner) is just promoted to the base name
+solo = {c: c[:-2] for c in g.columns if c.endswith("_y") and c[:-2] not in g.columns and c[:-2] not in pairs}
+if solo:
+    g = g.rename(columns=solo)
+g = g.drop(columns=[b + "_x" for b in pairs] + [b + "_y" for b in pairs], errors="ignore")
 
 # Quick field availability check
 want_fields = [
@@ -73,6 +80,33 @@ for f in want_fields:
     nn = pd.to_numeric(g.get(f), errors="coerce").notna().sum() if f in g.columns else 0
     print(f"{f}: in_columns={f in g.columns} non_null={nn}")
 
+# Pre-classify each mapped field once: quantile bin codes cached on the frame
+# so qmap plots a categorical column instead of re-running the classifier
+# (one sort per field total, not one per map)
+for f in want_fields:
+    if f in g.columns:
+        vals = pd.to_numeric(g[f], errors="coerce")
+        if vals.notna().sum() > 0:
+            g[f + "_q"] = pd.qcut(vals, 5, duplicates="drop").cat.codes.astype("Int8")
+
+# Quantile classifier: equal-count bin codes + breakpoints for a float64 array.
+# JIT-compiled when numba is installed (cached across runs).
+def quantile_bins(x, k):
+    s = np.sort(x)
+    breaks = np.array([s[int(i * len(s) / k)] for i in range(1, k)])
+    return np.searchsorted(breaks, x), breaks
+
+try:
+    from numba import njit
+    quantile_bins = njit(cache=True)(quantile_bins)
+except Exception:
+    pass
+
+# One figure reused for every map — teardown and layout passes otherwise
+# dominate when writing several PNGs back to back
+FIG, AX = plt.subplots(figsize=(7,7))
+FIG.subplots_adjust(left=0, right=1, top=0.95, bottom=0)
+
 # Helper: quantile choropleth
 def qmap(geodf, field, title, out_dir, fname, k=5):
     if field not in geodf.columns:
@@ -84,18 +118,26 @@ def qmap(geodf, field, title, out_dir, fname, k=5):
         print(f"[warn] No values for {field}; skipped map.")
         return
     sub = geodf.loc[mask].copy()
+    AX.clear()
     try:
-        ax = sub.plot(column=field, scheme="Quantiles", k=k, legend=True,
-                      figsize=(7,7), edgecolor="black", linewidth=0.25)
+        if field + "_q" in sub.columns:
+            # Reuse the cached bin codes — no classifier, no extra sort
+            ax = sub.plot(ax=AX, column=field + "_q", categorical=True, legend=True,
+                          edgecolor="black", linewidth=0.25)
+        else:
+            ax = sub.plot(ax=AX, column=field, scheme="Quantiles", k=k, legend=True,
+                          edgecolor="black", linewidth=0.25)
     except Exception:
-        ax = sub.plot(column=field, legend=True, figsize=(7,7),
+        # Fallback: bin codes from the (optionally JIT-ed) classifier
+        kk = min(k, max(1, sub[field].nunique()))
+        sub["_qcat"], _ = quantile_bins(data.loc[mask].to_numpy(dtype=np.float64), kk)
+        AX.clear()
+        ax = sub.plot(ax=AX, column="_qcat", categorical=True, legend=True,
                       edgecolor="black", linewidth=0.25)
     ax.set_axis_off()
     ax.set_title(title)
-    plt.tight_layout()
     out = os.path.join(out_dir, fname)
-    plt.savefig(out, dpi=200)
-    plt.close()
+    FIG.savefig(out, dpi=200)
     print("Wrote", out)
 
 # Helper: scatter with trend line and r values
@@ -137,16 +179,34 @@ def scatter(x, y, title, out_dir, fname, xlabel=None, ylabel=None):
     spear = d[x].corr(d[y], method="spearman")
     print(f"[corr] {x} ~ {y} | Pearson={pear:.3f}, Spearman={spear:.3f}")
 
-# 1) MAPS — network metrics
-qmap(g, "node_density",     "Node density (nodes / km²)",           DIR_NETWORK, "map_node_density.png")
-qmap(g, "edge_km_density",  "Edge density (km road / km²)",         DIR_NETWORK, "map_edge_density.png")
-qmap(g, "betweenness_mean", "Betweenness centrality (mean, nodes)", DIR_NETWORK, "map_betweenness_mean.png")
-qmap(g, "aspl_mean",        "Mean shortest path length (meters)",   DIR_NETWORK, "map_aspl_mean.png")
+# 1) MAPS — network metrics; 2) MAPS — ACS outcomes
+maps = [
+    ("node_density",     "Node density (nodes / km²)",           DIR_NETWORK, "map_node_density.png"),
+    ("edge_km_density",  "Edge density (km road / km²)",         DIR_NETWORK, "map_edge_density.png"),
+    ("betweenness_mean", "Betweenness centrality (mean, nodes)", DIR_NETWORK, "map_betweenness_mean.png"),
+    ("aspl_mean",        "Mean shortest path length (meters)",   DIR_NETWORK, "map_aspl_mean.png"),
+    ("owner_pct", "Owner-occupied share (%)", DIR_OUTCOME, "map_owner_pct_final.png"),
+    ("vac_rate",  "Vacancy rate (%)",         DIR_OUTCOME, "map_vac_rate_final.png"),
+    ("black_pct", "Black population (%)",     DIR_OUTCOME, "map_black_pct_final.png"),
+]
+
+def render_one(spec):
+    """Worker entry: render one map (each process draws into its own Agg figure)."""
+    qmap(g, *spec)
 
-# 2) MAPS — ACS outcomes
-qmap(g, "owner_pct", "Owner-occupied share (%)", DIR_OUTCOME, "map_owner_pct_final.png")
-qmap(g, "vac_rate",  "Vacancy rate (%)",         DIR_OUTCOME, "map_vac_rate_final.png")
-qmap(g, "black_pct", "Black population (%)",     DIR_OUTCOME, "map_black_pct_final.png")
+# Each PNG is an independent CPU-bound draw, so fan out across processes.
+# Only fork is usable here (a spawn child would re-execute this flat
+# script); platforms without fork fall back to the serial loop.
+try:
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing as mp
+    with ProcessPoolExecutor(max_workers=min(len(maps), os.cpu_count() or 1),
+                             mp_context=mp.get_context("fork")) as ex:
+        list(ex.map(render_one, maps))
+except Exception as e:
+    print(f"[warn] Parallel render unavailable ({e}); rendering serially.")
+    for spec in maps:
+        render_one(spec)
 
 # 3) SCATTERS — relationships from your proposal
 scatter("node_density", "owner_pct",
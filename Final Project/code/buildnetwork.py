@@ -2,15 +2,21 @@
 # Build a drivable street network for Community Area 75 (Morgan Park) using OSMnx.
 # Compatible with older OSMnx versions (no 'clean_periphery' kwarg).
 
+import hashlib
 import os
 import warnings
 
 import geopandas as gpd
 import matplotlib.pyplot as plt
-import networkx as nx
+import numpy as np
 import osmnx as ox
+import pandas as pd
+import scipy.sparse
+import shapely
+from scipy.sparse.csgraph import connected_components
 from shapely.geometry import Polygon, MultiPolygon
-from shapely.ops import unary_union
+
+from geoutils import geom_to_3857, geom_to_4326, read_bg, to_3857
 
 # Paths
 BG_GPKG   = r"data/spatial/ca75_acs_bg_maps.gpkg" # from HW4
@@ -31,22 +37,41 @@ os.makedirs(OUT_FIGS, exist_ok=True)
 warnings.filterwarnings("ignore", category=UserWarning)
 ox.settings.log_console = False
 ox.settings.use_cache = True
+# Keep the Overpass response cache under outputs/ so follow-up runs are
+# served entirely from disk (the default cache lives in the CWD and is
+# easy to lose between sessions)
+ox.settings.cache_folder = os.path.join(OUT_DIR, "osmnx_cache")
 
 
 def dissolve_to_single_polygon(gdf: gpd.GeoDataFrame) -> Polygon | MultiPolygon:
     """Dissolve a GeoDataFrame of BG polygons to a single CA boundary polygon."""
-    gdf = gdf[~gdf.geometry.is_empty & gdf.geometry.notna()].copy()
-    # Project to meters to smooth tiny artifacts
-    if gdf.crs is None:
-        gdf = gdf.set_crs(4326)
-    gproj = gdf.to_crs(3857)
-    geom_proj = unary_union(gproj.geometry.values)
-    geom_proj = geom_proj.buffer(50).buffer(-50)  # smooth slivers (meters)
-    ca_geom = gpd.GeoSeries([geom_proj], crs=3857).to_crs(4326).iloc[0]
-    return ca_geom
+    # Work on the raw geometry array end to end — filter, project to meters,
+    # union, and smooth slivers (50 m out/in) through shapely's vectorized
+    # ufuncs with no intermediate GeoSeries/GeoDataFrame rebuilds
+    geoms = gdf.geometry.values
+    geoms = geoms[shapely.is_geometry(geoms) & ~shapely.is_empty(geoms)]
+    geom_proj = shapely.union_all(geom_to_3857(geoms))
+    geom_proj = shapely.buffer(shapely.buffer(geom_proj, 50), -50)
+    return geom_to_4326(geom_proj)
 
 
 def get_drive_graph(poly):
+    """
+    Download the drive graph for a polygon, memoized on disk.
+    The cache key is a hash of the polygon WKB, so repeat runs (including the
+    buffered retry) load the saved GraphML instead of re-querying Overpass.
+    """
+    key = hashlib.sha1(poly.wkb).hexdigest()[:16]
+    cache_path = os.path.join(OUT_DIR, f"osm_{key}.graphml")
+    if os.path.exists(cache_path):
+        print(f"[INFO] Loading cached graph: {cache_path}")
+        return ox.load_graphml(cache_path)
+    G = download_drive_graph(poly)
+    ox.save_graphml(G, cache_path)
+    return G
+
+
+def download_drive_graph(poly):
     """
     Compatibility wrapper for different OSMnx versions.
     Tries newer signature first, then falls back to older ones.
@@ -68,19 +93,37 @@ def get_drive_graph(poly):
 
 def largest_connected_component(G):
     """Keep the largest connected component (standard for analysis)."""
-    UG = G.to_undirected()
-    if nx.is_connected(UG):
+    if G.number_of_edges() == 0:
         return G
-    comp = max(nx.connected_components(UG), key=len)
-    return G.subgraph(comp).copy()
+    # Component labels from scipy's compiled csgraph instead of materializing
+    # Python sets for every component
+    nodelist = list(G.nodes())
+    index = {n: i for i, n in enumerate(nodelist)}
+    pairs = np.array([(index[u], index[v]) for u, v in G.edges()], dtype=np.intp)
+    A = scipy.sparse.csr_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])),
+                                shape=(len(nodelist), len(nodelist)))
+    n_comp, labels = connected_components(A, directed=False)
+    if n_comp <= 1:
+        return G
+    keep = np.flatnonzero(labels == np.bincount(labels).argmax())
+    return G.subgraph([nodelist[i] for i in keep]).copy()
+
+
+def write_csv(df, path):
+    """Write CSV through pyarrow's multithreaded writer; fall back to pandas."""
+    try:
+        import pyarrow as pa, pyarrow.csv as pacsv
+        pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), path)
+    except Exception:
+        df.to_csv(path, index=False)
 
 
 def main():
     # 1) Read BG polygons from your HW4 GeoPackage (fallback: read without layer)
     try:
-        bg = gpd.read_file(BG_GPKG, layer=LAYER)
+        bg = read_bg(BG_GPKG, layer=LAYER)
     except Exception:
-        bg = gpd.read_file(BG_GPKG)
+        bg = read_bg(BG_GPKG)
     if bg.empty:
         raise SystemExit(f"[FAIL] No geometries found in {BG_GPKG}")
 
@@ -98,7 +141,9 @@ def main():
     # If graph is empty (rare), expand polygon slightly and retry
     if len(G.nodes) == 0:
         print("[WARN] Graph came back empty; expanding boundary slightly and retrying.")
-        ca_buff = gpd.GeoSeries([ca75_poly], crs=4326).to_crs(3857).buffer(150).to_crs(4326).iloc[0]
+        # Same cached-transformer path as the dissolve — no one-row GeoSeries
+        # round-trip just to buffer a single polygon
+        ca_buff = geom_to_4326(shapely.buffer(geom_to_3857(ca75_poly), 150))
         G = get_drive_graph(ca_buff)
         if len(G.nodes) == 0:
             raise SystemExit("[FAIL] Still empty after buffering; check boundary or internet connection.")
@@ -114,15 +159,15 @@ def main():
     nodes, edges = ox.graph_to_gdfs(G, nodes=True, edges=True)
     node_keep = [c for c in ["osmid", "x", "y"] if c in nodes.columns]
     edge_keep = [c for c in ["u", "v", "length", "highway", "name"] if c in edges.columns]
-    nodes[node_keep].to_csv(NODES_CSV, index=False)
-    edges[edge_keep].to_csv(EDGES_CSV, index=False)
+    write_csv(pd.DataFrame(nodes[node_keep]), NODES_CSV)
+    write_csv(pd.DataFrame(edges[edge_keep].reset_index(drop=True)), EDGES_CSV)
     print(f"[OK] Wrote node table: {NODES_CSV}")
     print(f"[OK] Wrote edge table: {EDGES_CSV}")
 
     # 6) Quick overview plot to confirm extent
     fig, ax = plt.subplots(1, 1, figsize=(8, 8))
-    edges.to_crs(3857).plot(ax=ax, linewidth=0.6, alpha=0.8)
-    gpd.GeoSeries([ca75_poly], crs=4326).to_crs(3857).boundary.plot(ax=ax, color="black", linewidth=1.2)
+    to_3857(edges).plot(ax=ax, linewidth=0.6, alpha=0.8)
+    gpd.GeoSeries([geom_to_3857(ca75_poly)], crs=3857).boundary.plot(ax=ax, color="black", linewidth=1.2)
     ax.set_axis_off()
     ax.set_title("CA 75 Drivable Network — Overview")
     plt.tight_layout()
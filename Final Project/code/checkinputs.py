@@ -37,7 +37,20 @@ need_cols_core = {
 }
 optional_id_cols = {"TRACT","BG"}
 
-df = pd.read_csv(ACS_CSV, dtype=str, low_memory=False)
+# Prefer pyarrow's multithreaded parser: IDs/counts pinned to string (as the
+# dtype=str read did) and the rate fields typed float64 up front, so the later
+# numeric coercion is a no-op. Plain pandas remains the fallback.
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+    header = pd.read_csv(ACS_CSV, nrows=0).columns
+    float_cols = {"black_pct","owner_pct","asian_pct","hisp_pct","vac_rate","u_20plus_pct"}
+    types = {c: (pa.float64() if c in float_cols else pa.string()) for c in header}
+    df = pacsv.read_csv(ACS_CSV,
+                        read_options=pacsv.ReadOptions(use_threads=True),
+                        convert_options=pacsv.ConvertOptions(column_types=types)).to_pandas()
+except Exception:
+    df = pd.read_csv(ACS_CSV, dtype=str, low_memory=False)
 
 missing_core = [c for c in need_cols_core if c not in df.columns]
 if missing_core:
@@ -82,7 +95,7 @@ ok("Rate fields look within 0..100 or NA.")
 # 5) Geometry file and GEOID overlap
 geom_found = False
 try:
-    import geopandas as gpd
+    from geoutils import read_bg, read_gpkg  # shared readers (import geopandas)
 except Exception:
     print("[WARN] geopandas not available; skipping geometry overlap check.")
     print("[READY] Inputs pass basic CSV checks.")
@@ -90,11 +103,11 @@ except Exception:
 
 if os.path.exists(SPATIAL):
     try:
-        g = gpd.read_file(SPATIAL, layer=LAYER)
+        g = read_bg(SPATIAL, layer=LAYER)
         geom_found = True
     except Exception:
         try:
-            g = gpd.read_file(SPATIAL)  # single-layer
+            g = read_bg(SPATIAL)  # single-layer
             geom_found = True
         except Exception as e:
             print(f"[WARN] Could not read {SPATIAL}: {e}")
@@ -102,7 +115,7 @@ else:
     gj = "data/spatial/ca75_acs_bg_maps.geojson"
     if os.path.exists(gj):
         try:
-            g = gpd.read_file(gj)
+            g = read_gpkg(gj)
             SPATIAL = gj
             geom_found = True
         except Exception as e:
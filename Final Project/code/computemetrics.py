@@ -3,13 +3,16 @@
 # Outputs: outputs/tables/bg_metrics.csv
 
 import os
-import math
 import warnings
+import numpy as np
 import pandas as pd
-import geopandas as gpd
 import networkx as nx
 import osmnx as ox
-from shapely.ops import unary_union
+import scipy.sparse
+import shapely
+from scipy.sparse.csgraph import connected_components, dijkstra
+
+from geoutils import T_4326_TO_3857, geom_to_3857, read_bg, to_3857
 
 # Paths
 GRAPHML = r"outputs/ca75_graph.graphml"
@@ -23,31 +26,76 @@ warnings.filterwarnings("ignore", category=UserWarning)
 
 # Helpers
 def largest_component(G):
-    UG = G.to_undirected()
-    if nx.is_connected(UG):
+    """Keep the largest connected component (labels from scipy's compiled csgraph)."""
+    if G.number_of_edges() == 0:
+        return G
+    nodelist = list(G.nodes())
+    A = build_csr_adjacency(G, nodelist)
+    n_comp, labels = connected_components(A, directed=False)
+    if n_comp <= 1:
         return G
-    comp = max(nx.connected_components(UG), key=len)
-    return G.subgraph(comp).copy()
+    keep = np.flatnonzero(labels == np.bincount(labels).argmax())
+    return G.subgraph([nodelist[i] for i in keep]).copy()
+
+def build_csr_adjacency(G, nodelist, weight="length"):
+    """
+    Length-weighted CSR adjacency for G, shared by every graph algorithm below.
+    Keeps the shortest of any parallel edges (csr_matrix would sum duplicates).
+    """
+    node_index = {n: i for i, n in enumerate(nodelist)}
+    n = len(nodelist)
+    best = {}
+    for u, v, w in G.edges(data=weight, default=0.0):
+        key = (node_index[u], node_index[v])
+        if key not in best or w < best[key]:
+            best[key] = float(w)
+    row = np.fromiter((k[0] for k in best), dtype=np.intp, count=len(best))
+    col = np.fromiter((k[1] for k in best), dtype=np.intp, count=len(best))
+    data = np.fromiter(best.values(), dtype=np.float64, count=len(best))
+    return scipy.sparse.csr_matrix((data, (row, col)), shape=(n, n))
 
-def all_pairs_mean_shortest_path_length(G, weight="length"):
+def all_pairs_mean_shortest_path_length(A, nodelist):
     """
-    Return a dict: node -> mean weighted shortest-path length to all reachable nodes.
-    Uses Dijkstra from each node; fine at this graph size (~500 nodes).
+    Return a dict: node -> mean weighted shortest-path length to all reachable
+    nodes, from the shared CSR adjacency via scipy's compiled all-pairs Dijkstra.
     """
-    means = {}
-    nodes = list(G.nodes())
-    for u in nodes:
-        lengths = nx.single_source_dijkstra_path_length(G, u, weight=weight)
-        if len(lengths) > 1:
-            # exclude self distance (0)
-            s = sum(d for v, d in lengths.items() if v != u)
-            means[u] = s / (len(lengths) - 1)
-        else:
-            means[u] = math.nan
-    return means
+    D = dijkstra(A, directed=False)
+    # Mean over reachable targets, excluding self distance (0); isolated nodes → NaN
+    reach = np.isfinite(D)
+    denom = reach.sum(axis=1) - 1
+    sums = np.where(reach, D, 0.0).sum(axis=1)
+    means = np.divide(sums, denom, out=np.full(len(nodelist), np.nan), where=denom > 0)
+    return dict(zip(nodelist, means))
+
+def betweenness_by_length(G, A, nodelist):
+    """
+    Length-weighted, normalized node betweenness from the shared CSR adjacency.
+    Runs Brandes in igraph's C core when python-igraph is installed
+    (NetworkX's pure-Python implementation is the fallback).
+    """
+    try:
+        import igraph as ig
+    except Exception:
+        return nx.betweenness_centrality(G, weight="length", normalized=True)
+    coo = A.tocoo()
+    n = len(nodelist)
+    # The CSR is directed, so a two-way street carries both (i,j) and (j,i);
+    # collapse to one undirected edge per unordered pair (min weight) before
+    # building the graph — parallel edges would inflate igraph's path counts
+    keys = np.minimum(coo.row, coo.col) * np.int64(n) + np.maximum(coo.row, coo.col)
+    uniq, inv = np.unique(keys, return_inverse=True)
+    w = np.full(len(uniq), np.inf)
+    np.minimum.at(w, inv, coo.data)
+    g = ig.Graph(n=n, edges=list(zip(uniq // n, uniq % n)), directed=False)
+    bc = g.betweenness(weights=w)
+    # Rescale to NetworkX's normalized=True convention
+    scale = 2.0 / ((n - 1) * (n - 2)) if n > 2 else 0.0
+    return {node: b * scale for node, b in zip(nodelist, bc)}
 
 def geodesic_to_metric(gdf, crs_metric=3857):
-    """Project to a metric CRS for area/length calculations."""
+    """Project to a metric CRS for area/length calculations (cached transformer for 3857)."""
+    if crs_metric == 3857:
+        return to_3857(gdf)
     if gdf.crs is None:
         gdf = gdf.set_crs(4326)
     return gdf.to_crs(crs_metric)
@@ -60,9 +108,9 @@ G = ox.load_graphml(GRAPHML)
 G = largest_component(G)
 
 try:
-    bg = gpd.read_file(BG_GPKG, layer=LAYER)
+    bg = read_bg(BG_GPKG, layer=LAYER)
 except Exception:
-    bg = gpd.read_file(BG_GPKG)
+    bg = read_bg(BG_GPKG)
 
 if bg.empty:
     raise SystemExit(f"[FAIL] No BG geometries found in {BG_GPKG}")
@@ -74,58 +122,124 @@ if "GEOID_BG" not in bg.columns:
     else:
         raise SystemExit("[FAIL] BG layer lacks GEOID/GEOID_BG.")
 
-# 2) Node/edge GeoDataFrames
-nodes_gdf, edges_gdf = ox.graph_to_gdfs(G, nodes=True, edges=True)
+# 2) Edge GeoDataFrame. Only the edges need real geometry (for the BG
+# clipping below); node attributes travel as plain numpy arrays instead of
+# a nodes GeoDataFrame — struct-of-arrays, no per-node Python objects.
+edges_gdf = ox.graph_to_gdfs(G, nodes=False, edges=True)
 
 # Guarantee a length attribute on edges
 if "length" not in edges_gdf.columns:
-    # compute from geometry if needed
-    e_proj = geodesic_to_metric(edges_gdf)
-    edges_gdf["length"] = e_proj.length.to_numpy()  # meters in projected CRS
+    # compute from geometry if needed: run the cached transformer over the raw
+    # geometry array and measure with shapely's ufunc — no frame reprojection
+    # just to read one scalar per edge
+    edges_gdf["length"] = shapely.length(geom_to_3857(edges_gdf.geometry.values))  # meters
 else:
     # some graphs store length in meters already, keep as-is
     pass
 
 # 3) Compute node metrics (betweenness, ASPL)
+# Build the length-weighted CSR adjacency once; betweenness and ASPL both run from it
+nodelist = list(G.nodes())
+A = build_csr_adjacency(G, nodelist, weight="length")
+
 print("[INFO] Computing node betweenness (weighted by length)…")
-btw = nx.betweenness_centrality(G, weight="length", normalized=True)
+btw = betweenness_by_length(G, A, nodelist)
 nx.set_node_attributes(G, btw, "betweenness")
 
 print("[INFO] Computing node mean shortest path length (ASPL, weighted)…")
-aspl = all_pairs_mean_shortest_path_length(G, weight="length")
+aspl = all_pairs_mean_shortest_path_length(A, nodelist)
 nx.set_node_attributes(G, aspl, "aspl")
 
-# Save back to GeoDataFrame
-nodes_gdf["betweenness"] = nodes_gdf.index.map(btw)
-nodes_gdf["aspl"] = nodes_gdf.index.map(aspl)
+# Node attribute arrays aligned to nodelist (struct-of-arrays)
+btw_arr  = np.array([btw[n] for n in nodelist], dtype=np.float64)
+aspl_arr = np.array([aspl[n] for n in nodelist], dtype=np.float64)
 
 # 4) Aggregate to block groups
 # Project to metric CRS for area/length
-bg_m   = geodesic_to_metric(bg)
-nodes_m = geodesic_to_metric(nodes_gdf)
+bg_m    = geodesic_to_metric(bg)
 edges_m = geodesic_to_metric(edges_gdf)
 
+# Node points straight from the graph's x/y attributes through the cached
+# transformer — no nodes GeoDataFrame, no per-row to_crs
+node_x = np.array([G.nodes[n]["x"] for n in nodelist], dtype=np.float64)
+node_y = np.array([G.nodes[n]["y"] for n in nodelist], dtype=np.float64)
+node_pts = shapely.points(*T_4326_TO_3857.transform(node_x, node_y))
+
 # BG area (km^2)
 bg_m["area_km2"] = bg_m.geometry.area / 1_000_000.0
+nbg = len(bg_m)
 
 # Nodes within BG → counts and stats
-nodes_in_bg = gpd.sjoin(nodes_m[["geometry","betweenness","aspl"]], bg_m[["GEOID_BG","geometry"]], predicate="within", how="left")
-nodes_grp = nodes_in_bg.groupby("GEOID_BG").agg(
-    nodes_in_bg=("geometry","count"),
-    betweenness_mean=("betweenness","mean"),
-    betweenness_p90=("betweenness", lambda s: s.quantile(0.90)),
-    aspl_mean=("aspl","mean"),
-).reset_index()
+# Containment pairs straight from an STRtree query over the raw geometry
+# arrays — skips the index/broadcast overhead of gpd.sjoin
+bg_tree = shapely.STRtree(bg_m.geometry.values)
+idx_node, idx_bg = bg_tree.query(node_pts, predicate="within")
+
+# Per-BG sums/counts via scatter-add on positional BG indices — replaces the
+# groupby round-trip through an intermediate DataFrame
+counts   = np.zeros(nbg)
+btw_sum  = np.zeros(nbg)
+aspl_sum = np.zeros(nbg)
+aspl_cnt = np.zeros(nbg)
+np.add.at(counts, idx_bg, 1.0)
+np.add.at(btw_sum, idx_bg, btw_arr[idx_node])
+a_vals = aspl_arr[idx_node]
+a_fin = np.isfinite(a_vals)  # isolated nodes carry NaN ASPL; skip like .mean() does
+np.add.at(aspl_sum, idx_bg[a_fin], a_vals[a_fin])
+np.add.at(aspl_cnt, idx_bg[a_fin], 1.0)
+
+has_node = counts > 0
+betweenness_mean = np.divide(btw_sum, counts, out=np.full(nbg, np.nan), where=has_node)
+aspl_mean = np.divide(aspl_sum, aspl_cnt, out=np.full(nbg, np.nan), where=aspl_cnt > 0)
+
+# p90: sort the pair list by BG once, then take the percentile per segment
+betweenness_p90 = np.full(nbg, np.nan)
+if len(idx_bg):
+    order = np.argsort(idx_bg, kind="stable")
+    sb, sv = idx_bg[order], btw_arr[idx_node][order]
+    starts = np.flatnonzero(np.r_[True, np.diff(sb) > 0])
+    for s, e in zip(starts, np.r_[starts[1:], len(sb)]):
+        betweenness_p90[sb[s]] = np.percentile(sv[s:e], 90)
 
 # Edges intersect BG → sum intersection length
-# Intersect each edge with BGs, sum length in km per BG
-inter = gpd.overlay(edges_m[["geometry","length"]], bg_m[["GEOID_BG","geometry"]], how="intersection")
-# geometry is the clipped portion; compute length in meters then km
-inter["len_km"] = inter.geometry.length / 1000.0
-edges_grp = inter.groupby("GEOID_BG").agg(edges_km=("len_km","sum")).reset_index()
-
-# Merge node/edge summaries with BG area
-metrics = bg_m[["GEOID_BG","area_km2"]].merge(nodes_grp, on="GEOID_BG", how="left").merge(edges_grp, on="GEOID_BG", how="left")
+# Candidate pairs come from the same STRtree already built for the node
+# membership query — one tree serves both predicates instead of sjoin
+# rebuilding its own. The vectorized clip then fans out over pair slices
+# with joblib when it is installed (threads: the GEOS ufuncs release the
+# GIL, and the workers read the shared geometry arrays without pickling).
+edge_geoms = edges_m.geometry.values
+e_idx, b_idx = bg_tree.query(edge_geoms, predicate="intersects")
+
+def edge_km_for_pair_slice(lo, hi):
+    """Clip candidate pairs [lo:hi); return (BG positions, lengths in km)."""
+    cl = shapely.intersection(edge_geoms[e_idx[lo:hi]],
+                              bg_m.geometry.values[b_idx[lo:hi]])
+    return b_idx[lo:hi], shapely.length(cl) / 1000.0
+
+bounds = np.linspace(0, len(e_idx), min(len(e_idx), os.cpu_count() or 1) + 1).astype(int)
+slices = [(lo, hi) for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+try:
+    from joblib import Parallel, delayed
+    parts = Parallel(n_jobs=-1, prefer="threads")(
+        delayed(edge_km_for_pair_slice)(lo, hi) for lo, hi in slices)
+except Exception:
+    parts = [edge_km_for_pair_slice(lo, hi) for lo, hi in slices]
+
+edges_km = np.zeros(nbg)
+has_edge = np.zeros(nbg, dtype=bool)
+for bg_pos, len_km in parts:
+    np.add.at(edges_km, bg_pos, len_km)
+    has_edge[bg_pos] = True
+
+# Assemble the per-BG table: everything above is positional against bg_m,
+# so the columns drop straight in — no merges. Empty BGs keep NaN (as the
+# old left-joins produced) so the density columns stay NaN there too.
+metrics = bg_m[["GEOID_BG","area_km2"]].copy()
+metrics["nodes_in_bg"] = np.where(has_node, counts, np.nan)
+metrics["betweenness_mean"] = betweenness_mean
+metrics["betweenness_p90"] = betweenness_p90
+metrics["aspl_mean"] = aspl_mean
+metrics["edges_km"] = np.where(has_edge, edges_km, np.nan)
 
 # Densities
 metrics["node_density"] = metrics["nodes_in_bg"] / metrics["area_km2"]
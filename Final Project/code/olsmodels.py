@@ -1,4 +1,5 @@
 # olsmodels.py
+import numpy as np
 import pandas as pd
 import statsmodels.api as sm
 
@@ -11,11 +12,18 @@ pairs = [
     ("owner_pct", "betweenness_mean"),
 ]
 
+# Coerce every column the models touch once into one float matrix; each pair
+# then just masks and stacks arrays instead of re-coercing per regression
+cols = sorted({c for pair in pairs for c in pair})
+num = df[cols].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+ix = {c: i for i, c in enumerate(cols)}
+
 for y, x in pairs:
-    sub = df[[y, x]].apply(pd.to_numeric, errors="coerce").dropna()
-    X = sm.add_constant(sub[x].values)
-    yv = sub[y].values
-    model = sm.OLS(yv, X).fit()
+    yv, xv = num[:, ix[y]], num[:, ix[x]]
+    mask = np.isfinite(yv) & np.isfinite(xv)
+    n = int(mask.sum())
+    X = np.column_stack([np.ones(n), xv[mask]])
+    model = sm.OLS(yv[mask], X).fit()
     print(f"\n=== {y} ~ {x} ===")
     print(model.summary().tables[1])
-    print(f"R^2: {model.rsquared:.3f}   n={len(sub)}")
+    print(f"R^2: {model.rsquared:.3f}   n={n}")